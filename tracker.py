@@ -1,175 +1,458 @@
 
 
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import streamlit as st
 from datetime import datetime, timedelta
 import sqlite3
+import threading
 import hashlib
+import hmac
 import io
+import os
+from contextlib import contextmanager
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib import colors
 import xlsxwriter
 
+_INSERT_EXPENSE_SQL = '''
+    INSERT INTO expenses (user_id, date, category, amount, description)
+    VALUES (?, ?, ?, ?, ?)
+'''
+_DELETE_EXPENSE_SQL = 'DELETE FROM expenses WHERE id = ? AND user_id = ?'
+_DUMMY_SALT = os.urandom(16)
+
+SORT_ORDERS = {
+    'Date (Newest)': 'date DESC, id DESC',
+    'Date (Oldest)': 'date ASC, id ASC',
+    'Amount (High-Low)': 'amount DESC, id DESC',
+    'Amount (Low-High)': 'amount ASC, id ASC',
+}
+PAGE_SIZE = 50
+# Cache keys carry data_version, so every write strands the previous entries; cap them.
+CACHE_MAX_ENTRIES = 50
+
 class Database:
     def __init__(self, db_name='expense_tracker.db'):
         self.db_name = db_name
+        self.lock = threading.RLock()
+        self._data_versions = {}
+        self._conn = sqlite3.connect(db_name, check_same_thread=False, isolation_level=None,
+                                     cached_statements=256)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA temp_store=MEMORY')
+        self._conn.execute('PRAGMA mmap_size=268435456')
+        self._conn.execute('PRAGMA cache_size=-20000')
         self.init_database()
     
     def get_connection(self):
-        return sqlite3.connect(self.db_name, check_same_thread=False)
+        return self._conn
+    
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._conn.cursor()
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            else:
+                self._conn.execute('COMMIT')
+    
+    def data_version(self, user_id):
+        return self._data_versions.get(user_id, 0)
+    
+    def bump_data_version(self, user_id):
+        with self.lock:
+            self._data_versions[user_id] = self._data_versions.get(user_id, 0) + 1
+    
+    def fetch_records(self, query, params=()):
+        with self.lock:
+            cursor = self._conn.execute(query, params)
+            return cursor.fetchall(), [column[0] for column in cursor.description]
+    
+    def fetch_one(self, query, params=()):
+        with self.lock:
+            return self._conn.execute(query, params).fetchone()
     
     def init_database(self):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                email TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS expenses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                date DATE NOT NULL,
-                category TEXT NOT NULL,
-                amount REAL NOT NULL,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT UNIQUE NOT NULL,
+                    password_hash TEXT NOT NULL,
+                    salt BLOB,
+                    email TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            cursor.execute('PRAGMA table_info(users)')
+            if 'salt' not in {column[1] for column in cursor.fetchall()}:
+                cursor.execute('ALTER TABLE users ADD COLUMN salt BLOB')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS expenses (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    date DATE NOT NULL,
+                    category TEXT NOT NULL,
+                    amount REAL NOT NULL,
+                    description TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    month_key TEXT GENERATED ALWAYS AS (strftime('%Y-%m', date)) VIRTUAL,
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                )
+            ''')
+
+            cursor.execute('PRAGMA table_xinfo(expenses)')
+            if 'month_key' not in {column[1] for column in cursor.fetchall()}:
+                cursor.execute('''
+                    ALTER TABLE expenses
+                    ADD COLUMN month_key TEXT GENERATED ALWAYS AS (strftime('%Y-%m', date)) VIRTUAL
+                ''')
+
+            # id is spelled out so the index order matches the date sorts' id tie-break.
+            cursor.execute('DROP INDEX IF EXISTS idx_expenses_user_date')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_expenses_user_date_id ON expenses (user_id, date DESC, id DESC)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_expenses_user_cat ON expenses (user_id, category)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_expenses_user_month ON expenses (user_id, month_key, date DESC)')
     
-    def hash_password(self, password):
-        return hashlib.sha256(password.encode()).hexdigest()
+    def hash_password(self, password, salt):
+        return hashlib.scrypt(password.encode(), salt=salt, n=2**14, r=8, p=1, dklen=32).hex()
     
     def create_user(self, username, password, email=''):
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            password_hash = self.hash_password(password)
-            cursor.execute('INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)',
-                         (username, password_hash, email))
-            conn.commit()
+            salt = os.urandom(16)
+            password_hash = self.hash_password(password, salt)
+            with self.transaction() as cursor:
+                cursor.execute('INSERT INTO users (username, password_hash, salt, email) VALUES (?, ?, ?, ?)',
+                             (username, password_hash, salt, email))
             return True, "User created successfully!"
         except sqlite3.IntegrityError:
             return False, "Username already exists!"
-        finally:
-            conn.close()
     
     def authenticate_user(self, username, password):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        password_hash = self.hash_password(password)
-        cursor.execute('SELECT id, username FROM users WHERE username = ? AND password_hash = ?',
-                      (username, password_hash))
-        user = cursor.fetchone()
-        conn.close()
-        return user if user else None
+        user = self.fetch_one('SELECT id, username, password_hash, salt FROM users WHERE username = ?',
+                              (username,))
+        if not user:
+            # Pay the same scrypt cost as a real account so response time doesn't reveal usernames.
+            self.hash_password(password, _DUMMY_SALT)
+            return None
+        
+        user_id, username, password_hash, salt = user
+        if salt is None:
+            # Accounts created before salts were stored hold a bare SHA-256 digest;
+            # accept it once and re-hash with scrypt.
+            if not hmac.compare_digest(password_hash, hashlib.sha256(password.encode()).hexdigest()):
+                self.hash_password(password, _DUMMY_SALT)
+                return None
+            salt = os.urandom(16)
+            with self.transaction() as cursor:
+                cursor.execute('UPDATE users SET password_hash = ?, salt = ? WHERE id = ?',
+                             (self.hash_password(password, salt), salt, user_id))
+        elif not hmac.compare_digest(password_hash, self.hash_password(password, salt)):
+            return None
+        return user_id, username
+
+@st.cache_resource(show_spinner=False)
+def get_db():
+    return Database()
+
+def _days_ago(days):
+    return (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+
+def _month_key(month, year):
+    return f"{year:04d}-{month:02d}"
+
+def _filter_where(user_id, filter_category, since):
+    # Only emit the predicates that are set, so category/date become index seeks
+    # instead of `? IS NULL OR ...` checks evaluated on every row.
+    clauses, params = ['user_id = ?'], [user_id]
+    if filter_category is not None:
+        clauses.append('category = ?')
+        params.append(filter_category)
+    if since is not None:
+        clauses.append('date > ?')
+        params.append(since)
+    return 'WHERE ' + ' AND '.join(clauses), params
+
+def _read_expenses(db, query, params):
+    rows, columns = db.fetch_records(query, params)
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    
+    if not df.empty:
+        df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d', cache=True)
+        if 'category' in df:
+            df['category'] = df['category'].astype('category')
+    return df
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)
+def _load_expenses(_db, user_id, version):
+    query = '''
+        SELECT id, date, category, amount, description, created_at
+        FROM expenses
+        WHERE user_id = ?
+        ORDER BY date DESC
+    '''
+    return _read_expenses(_db, query, (user_id,))
+
+def _load_filtered_expenses(db, user_id, filter_category, since, sort_by, limit, offset):
+    where, params = _filter_where(user_id, filter_category, since)
+    query = f'''
+        SELECT id, date, category, amount, description, created_at
+        FROM expenses
+        {where}
+        ORDER BY {SORT_ORDERS[sort_by]}
+        LIMIT ? OFFSET ?
+    '''
+    params += [-1 if limit is None else limit, offset]
+    return _read_expenses(db, query, params)
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)
+def _load_filtered_totals(_db, user_id, version, filter_category, since):
+    where, params = _filter_where(user_id, filter_category, since)
+    query = f'SELECT COUNT(*), COALESCE(SUM(amount), 0) FROM expenses {where}'
+    return _db.fetch_one(query, params)
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)
+def _load_dashboard_metrics(_db, user_id, version, since):
+    query = '''
+        SELECT COALESCE(SUM(amount), 0),
+               COUNT(*),
+               COALESCE(SUM(CASE WHEN date > ? THEN amount ELSE 0 END), 0)
+        FROM expenses
+        WHERE user_id = ?
+    '''
+    return _db.fetch_one(query, (since, user_id))
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)
+def _load_category_summary(_db, user_id, version):
+    query = '''
+        SELECT category, SUM(amount) AS Total, COUNT(*) AS Count
+        FROM expenses
+        WHERE user_id = ?
+        GROUP BY category
+        ORDER BY Total DESC
+    '''
+    rows, columns = _db.fetch_records(query, (user_id,))
+    summary = pd.DataFrame.from_records(rows, columns=columns, index='category')
+    if summary.empty:
+        return pd.DataFrame()
+    
+    summary['Percentage'] = (summary['Total'] / summary['Total'].sum() * 100).round(2)
+    return summary
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)
+def _load_monthly_data(_db, user_id, version, month, year):
+    query = '''
+        SELECT id, date, category, amount, description, created_at
+        FROM expenses
+        WHERE user_id = ? AND month_key = ?
+        ORDER BY date DESC
+    '''
+    return _read_expenses(_db, query, (user_id, _month_key(month, year)))
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)
+def _load_top_n_in_month(_db, user_id, version, month, year, n):
+    query = '''
+        SELECT date, category, amount, description
+        FROM expenses
+        WHERE user_id = ? AND month_key = ?
+        ORDER BY amount DESC
+        LIMIT ?
+    '''
+    return _read_expenses(_db, query, (user_id, _month_key(month, year), n))
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)
+def _load_daily_totals(_db, user_id, version, since):
+    query = '''
+        SELECT date, SUM(amount) AS amount
+        FROM expenses
+        WHERE user_id = ? AND date > ?
+        GROUP BY date
+        ORDER BY date
+    '''
+    return _read_expenses(_db, query, (user_id, since))
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)
+def _load_monthly_totals(_db, user_id, version):
+    query = '''
+        SELECT month_key AS month, SUM(amount) AS amount
+        FROM expenses
+        WHERE user_id = ?
+        GROUP BY month_key
+        ORDER BY month_key
+    '''
+    rows, columns = _db.fetch_records(query, (user_id,))
+    return pd.DataFrame.from_records(rows, columns=columns)
+
+def _figure_png(fig):
+    output = io.BytesIO()
+    fig.savefig(output, format='png', dpi=200, bbox_inches='tight')
+    return output.getvalue()
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)
+def _render_category_pie(_db, user_id, version):
+    category_totals = _load_category_summary(_db, user_id, version)['Total'].sort_index()
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    ax.pie(category_totals.values, labels=category_totals.index, autopct='%1.1f%%', startangle=90)
+    ax.set_title('Category Distribution')
+    return _figure_png(fig)
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)
+def _render_daily_trend(_db, user_id, version, since):
+    daily_spending = _load_daily_totals(_db, user_id, version, since)
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    ax.plot(daily_spending['date'], daily_spending['amount'], marker='o', linestyle='-', linewidth=2)
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Amount ($)')
+    ax.set_title('Daily Spending (Last 30 Days)')
+    ax.tick_params(axis='x', rotation=45)
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    return _figure_png(fig)
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)
+def _render_category_bar(_db, user_id, version):
+    summary = _load_category_summary(_db, user_id, version)
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    summary['Total'].sort_values(ascending=True).plot(kind='barh', ax=ax, color='steelblue')
+    ax.set_xlabel('Amount ($)')
+    ax.set_title('Total Spending by Category')
+    return _figure_png(fig)
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES)
+def _render_monthly_trend(_db, user_id, version):
+    monthly_spending = _load_monthly_totals(_db, user_id, version)
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    ax.bar(monthly_spending['month'], monthly_spending['amount'], color='coral')
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Amount ($)')
+    ax.set_title('Monthly Spending')
+    ax.tick_params(axis='x', rotation=45)
+    return _figure_png(fig)
 
 class ExpenseTracker:
     def __init__(self, db, user_id):
         self.db = db
         self.user_id = user_id
+        self._expenses = (None, None)
     
     def add_expense(self, date, category, amount, description=''):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO expenses (user_id, date, category, amount, description)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (self.user_id, date, category, amount, description))
-        conn.commit()
-        conn.close()
+        self.add_expenses_bulk([(date, category, amount, description)])
         return True
     
+    def add_expenses_bulk(self, rows):
+        with self.db.transaction() as cursor:
+            cursor.executemany(_INSERT_EXPENSE_SQL, [(self.user_id, *row) for row in rows])
+            inserted = cursor.rowcount
+            if inserted > 0:
+                self.db.bump_data_version(self.user_id)
+        return inserted
+    
+    @property
+    def data_version(self):
+        return self.db.data_version(self.user_id)
+    
     def get_expenses(self):
-        conn = self.db.get_connection()
-        query = '''
-            SELECT id, date, category, amount, description, created_at
-            FROM expenses
-            WHERE user_id = ?
-            ORDER BY date DESC
-        '''
-        df = pd.read_sql_query(query, conn, params=(self.user_id,))
-        conn.close()
-        
-        if not df.empty:
-            df['date'] = pd.to_datetime(df['date'])
-        return df
+        # st.cache_data hands back a fresh copy on every call; keep the one for the
+        # current data_version so repeated calls within a session share it.
+        version = self.data_version
+        if self._expenses[0] != version:
+            self._expenses = (version, _load_expenses(self.db, self.user_id, version))
+        return self._expenses[1]
     
-    def get_filtered_expenses(self, filter_category=None, days=None):
-        df = self.get_expenses()
-        
-        if not df.empty:
-            if filter_category and filter_category != 'All':
-                df = df[df['category'] == filter_category]
-            
-            if days:
-                cutoff_date = datetime.now() - timedelta(days=days)
-                df = df[df['date'] >= cutoff_date]
-        
-        return df
+    def get_filtered_expenses(self, filter_category=None, days=None, sort_by='Date (Newest)',
+                              limit=None, offset=0):
+        if filter_category == 'All':
+            filter_category = None
+        since = _days_ago(days) if days else None
+        # Pages are single indexed LIMIT/OFFSET queries; caching every page x filter x sort
+        # combination per data_version would cost more memory than the query costs time.
+        return _load_filtered_expenses(self.db, self.user_id, filter_category, since,
+                                       sort_by, limit, offset)
+    
+    def get_filtered_totals(self, filter_category=None, days=None):
+        if filter_category == 'All':
+            filter_category = None
+        since = _days_ago(days) if days else None
+        return _load_filtered_totals(self.db, self.user_id, self.data_version,
+                                     filter_category, since)
+    
+    def get_totals(self):
+        return self.get_filtered_totals()
+    
+    def get_dashboard_metrics(self, last_n_days=30):
+        return _load_dashboard_metrics(self.db, self.user_id, self.data_version,
+                                       _days_ago(last_n_days))
     
     def get_category_summary(self):
-        df = self.get_expenses()
-        if df.empty:
-            return pd.DataFrame()
-        
-        summary = df.groupby('category')['amount'].agg(['sum', 'count'])
-        summary.columns = ['Total', 'Count']
-        summary['Percentage'] = (summary['Total'] / summary['Total'].sum() * 100).round(2)
-        return summary.sort_values('Total', ascending=False)
+        return _load_category_summary(self.db, self.user_id, self.data_version)
     
     def get_monthly_data(self, month, year):
-        df = self.get_expenses()
-        if df.empty:
-            return pd.DataFrame()
-        
-        mask = (df['date'].dt.month == month) & (df['date'].dt.year == year)
-        return df[mask]
+        return _load_monthly_data(self.db, self.user_id, self.data_version, month, year)
+    
+    def get_top_n_in_month(self, month, year, n=5):
+        return _load_top_n_in_month(self.db, self.user_id, self.data_version, month, year, n)
     
     def delete_expense(self, expense_id):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM expenses WHERE id = ? AND user_id = ?', 
-                      (expense_id, self.user_id))
-        conn.commit()
-        affected = cursor.rowcount
-        conn.close()
+        with self.db.transaction() as cursor:
+            cursor.execute(_DELETE_EXPENSE_SQL, (expense_id, self.user_id))
+            affected = cursor.rowcount
+            if affected > 0:
+                self.db.bump_data_version(self.user_id)
         return affected > 0
 
 class ReportExporter:
     @staticmethod
     def export_to_excel(df, filename='expense_report.xlsx'):
         output = io.BytesIO()
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+        money_format = workbook.add_format({'num_format': '$#,##0.00'})
+
+        expense_ids = df['id'].to_numpy()
+        dates = df['date'].to_numpy(dtype='datetime64[D]').astype(object)
+        categories = df['category'].to_numpy(dtype=object)
+        amounts = df['amount'].to_numpy()
+        descriptions = df['description'].fillna('').to_numpy(dtype=object)
+        created = df['created_at'].to_numpy(dtype=object)
+
+        worksheet = workbook.add_worksheet('Expenses')
+        worksheet.set_column('B:B', 12)
+        worksheet.set_column('D:D', 12)
+        worksheet.write_row(0, 0, ['id', 'date', 'category', 'amount', 'description', 'created_at'], header_format)
+        rows = zip(expense_ids, dates, categories, amounts, descriptions, created)
+        for r, (expense_id, date, category, amount, description, created_at) in enumerate(rows, start=1):
+            worksheet.write_number(r, 0, expense_id)
+            worksheet.write_datetime(r, 1, date, date_format)
+            worksheet.write_string(r, 2, category)
+            worksheet.write_number(r, 3, amount, money_format)
+            if description:
+                worksheet.write_string(r, 4, description)
+            worksheet.write_string(r, 5, created_at)
+
+        if not df.empty:
+            summary = df.groupby('category', observed=True)['amount'].sum()
+            worksheet = workbook.add_worksheet('Summary')
+            worksheet.write_row(0, 0, ['Category', 'Total Amount'], header_format)
+            for r, (category, total) in enumerate(summary.items(), start=1):
+                worksheet.write_string(r, 0, category)
+                worksheet.write_number(r, 1, total)
         
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df_export = df.copy()
-            df_export['date'] = df_export['date'].dt.strftime('%Y-%m-%d')
-            df_export.to_excel(writer, sheet_name='Expenses', index=False)
-
-            if not df.empty:
-                summary = df.groupby('category')['amount'].sum().reset_index()
-                summary.columns = ['Category', 'Total Amount']
-                summary.to_excel(writer, sheet_name='Summary', index=False)
-            workbook = writer.book
-            worksheet = writer.sheets['Expenses']
-            
-            money_format = workbook.add_format({'num_format': '$#,##0.00'})
-            worksheet.set_column('D:D', 12, money_format)
-        
+        workbook.close()
         output.seek(0)
         return output
     
@@ -195,18 +478,13 @@ class ReportExporter:
         elements.append(Spacer(1, 20))
 
         if not df.empty:
-            df_display = df.copy()
-            df_display['date'] = df_display['date'].dt.strftime('%Y-%m-%d')
-            df_display['amount'] = df_display['amount'].apply(lambda x: f"${x:.2f}")
+            dates = df['date'].to_numpy(dtype='datetime64[D]').astype(str)
+            categories = df['category'].to_numpy(dtype=object)
+            amounts = np.char.mod('$%.2f', df['amount'].to_numpy())
+            descriptions = df['description'].fillna('').str.slice(0, 30).to_numpy(dtype=object)
             
-            table_data = [['Date', 'Category', 'Amount', 'Description']]
-            for _, row in df_display.iterrows():
-                table_data.append([
-                    row['date'],
-                    row['category'],
-                    row['amount'],
-                    row['description'][:30] if row['description'] else ''
-                ])
+            table_data = [['Date', 'Category', 'Amount', 'Description'],
+                          *zip(dates, categories, amounts, descriptions)]
             
             table = Table(table_data)
             table.setStyle(TableStyle([
@@ -226,6 +504,30 @@ class ReportExporter:
         return output
 
 
+def parse_expenses_csv(csv_file, categories):
+    # Read text columns as str so a date like 20260102 isn't inferred as an integer.
+    df = pd.read_csv(csv_file, dtype={'date': str, 'category': str, 'description': str})
+    missing = {'date', 'category', 'amount'} - set(df.columns)
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(sorted(missing))}")
+
+    dates = pd.to_datetime(df['date'], format='%Y-%m-%d', errors='coerce')
+    amounts = pd.to_numeric(df['amount'], errors='coerce')
+    with np.errstate(over='ignore'):
+        # Round to cents like the manual form; amounts too large to hold in cents overflow to inf.
+        amounts = amounts.round(2)
+    if dates.isna().any():
+        raise ValueError("Every row needs a valid YYYY-MM-DD date")
+    if not np.isfinite(amounts).all() or (amounts <= 0).any():
+        raise ValueError("Every amount must be a number greater than 0")
+    unknown = set(df['category']) - set(categories)
+    if unknown:
+        raise ValueError(f"Unknown categories: {', '.join(sorted(map(str, unknown)))}")
+
+    descriptions = df['description'].fillna('').astype(str) if 'description' in df else [''] * len(df)
+    return list(zip(dates.dt.strftime('%Y-%m-%d'), df['category'], amounts.astype(float), descriptions))
+
+
 def login_page():
     st.markdown('<h1 class="main-header">🔐 Expense Tracker Login</h1>', unsafe_allow_html=True)
     
@@ -277,6 +579,248 @@ def login_page():
                     st.warning("Please fill in all required fields")
 
 
+@st.fragment
+def dashboard_fragment(tracker):
+    st.header("📈 Dashboard Overview")
+
+    total_spent, num_transactions, last_30_days_total = tracker.get_dashboard_metrics(last_n_days=30)
+
+    if num_transactions == 0:
+        st.info("No expenses recorded yet. Start by adding your first expense!")
+    else:
+        col1, col2, col3, col4 = st.columns(4)
+
+        avg_transaction = total_spent / num_transactions
+
+        with col1:
+            st.metric("Total Spent", f"${total_spent:,.2f}")
+        with col2:
+            st.metric("Transactions", num_transactions)
+        with col3:
+            st.metric("Avg Transaction", f"${avg_transaction:.2f}")
+        with col4:
+            st.metric("Last 30 Days", f"${last_30_days_total:,.2f}")
+
+        st.divider()
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.subheader("Spending by Category")
+            st.image(_render_category_pie(tracker.db, tracker.user_id, tracker.data_version))
+
+        with col2:
+            st.subheader("Recent Spending Trend")
+            st.image(_render_daily_trend(tracker.db, tracker.user_id, tracker.data_version, _days_ago(30)))
+
+
+@st.fragment
+def view_expenses_fragment(tracker, categories):
+    st.header("📋 View Expenses")
+
+    expense_count, _ = tracker.get_totals()
+
+    if expense_count == 0:
+        st.info("No expenses to display.")
+    else:
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            filter_category = st.selectbox("Filter by Category", ['All'] + categories)
+
+        with col2:
+            filter_days = st.selectbox("Time Period", 
+                                     ['All Time', 'Last 7 Days', 'Last 30 Days', 'Last 90 Days'])
+            days_map = {'All Time': None, 'Last 7 Days': 7, 'Last 30 Days': 30, 'Last 90 Days': 90}
+            days = days_map[filter_days]
+
+        with col3:
+            sort_by = st.selectbox("Sort by", list(SORT_ORDERS))
+
+        filter_category = filter_category if filter_category != 'All' else None
+        count, total = tracker.get_filtered_totals(filter_category=filter_category, days=days)
+
+        if count > 0:
+            st.metric("Total", f"${total:,.2f}")
+
+            num_pages = (count + PAGE_SIZE - 1) // PAGE_SIZE
+            page = 1
+            if num_pages > 1:
+                page = st.number_input(f"Page (of {num_pages})", min_value=1, max_value=num_pages, step=1,
+                                       key=f"page_{filter_category}_{days}")
+
+            page_df = tracker.get_filtered_expenses(
+                filter_category=filter_category,
+                days=days,
+                sort_by=sort_by,
+                limit=PAGE_SIZE,
+                offset=(page - 1) * PAGE_SIZE
+            )
+
+            st.dataframe(
+                page_df[['id', 'date', 'category', 'amount', 'description']],
+                column_config={
+                    'date': st.column_config.DateColumn('date', format='YYYY-MM-DD'),
+                    'amount': st.column_config.NumberColumn('amount', format='$%.2f'),
+                },
+                use_container_width=True,
+                hide_index=True
+            )
+
+            st.divider()
+            with st.expander("🗑️ Delete an Expense"):
+                delete_id = st.number_input("Enter expense ID to delete", min_value=1, step=1)
+                if st.button("Delete Expense"):
+                    if tracker.delete_expense(delete_id):
+                        st.success("Expense deleted!")
+                        st.rerun()
+                    else:
+                        st.error("Invalid ID or permission denied")
+        else:
+            st.info("No expenses match the selected filters.")
+
+
+@st.fragment
+def analytics_fragment(tracker):
+    st.header("📊 Analytics & Insights")
+
+    expense_count, _ = tracker.get_totals()
+
+    if expense_count == 0:
+        st.info("No data available for analysis.")
+    else:
+        st.subheader("Category Breakdown")
+        summary = tracker.get_category_summary()
+
+        col1, col2 = st.columns([2, 1])
+
+        with col1:
+            st.dataframe(summary, use_container_width=True)
+
+        with col2:
+            top_category = summary.index[0]
+            top_amount = summary.iloc[0]['Total']
+            st.metric("Top Category", top_category)
+            st.metric("Amount", f"${top_amount:,.2f}")
+
+        st.divider()
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.subheader("Category Comparison")
+            st.image(_render_category_bar(tracker.db, tracker.user_id, tracker.data_version))
+
+        with col2:
+            st.subheader("Monthly Trend")
+            st.image(_render_monthly_trend(tracker.db, tracker.user_id, tracker.data_version))
+
+
+@st.fragment
+def monthly_report_fragment(tracker):
+    st.header("📅 Monthly Report")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        selected_month = st.selectbox("Month", range(1, 13), index=datetime.now().month - 1,
+                                    format_func=lambda x: datetime(2000, x, 1).strftime('%B'))
+    with col2:
+        selected_year = st.number_input("Year", min_value=2000, max_value=2100, value=datetime.now().year)
+
+    if st.button("Generate Report", use_container_width=True):
+        monthly_data = tracker.get_monthly_data(selected_month, selected_year)
+
+        if monthly_data.empty:
+            st.warning(f"No expenses found for {datetime(2000, selected_month, 1).strftime('%B')} {selected_year}")
+        else:
+            total_spent = monthly_data['amount'].sum()
+            num_transactions = len(monthly_data)
+            avg_transaction = total_spent / num_transactions
+
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Total Spent", f"${total_spent:,.2f}")
+            with col2:
+                st.metric("Transactions", num_transactions)
+            with col3:
+                st.metric("Average", f"${avg_transaction:.2f}")
+
+            st.divider()
+
+            st.subheader("Category Breakdown")
+            category_summary = monthly_data.groupby('category', observed=True)['amount'].agg(['sum', 'count'])
+            category_summary.columns = ['Total', 'Count']
+            category_summary['Percentage'] = (category_summary['Total'] / total_spent * 100).round(2)
+            category_summary = category_summary.sort_values('Total', ascending=False)
+            st.dataframe(category_summary, use_container_width=True)
+
+            st.divider()
+
+            st.subheader("Top 5 Expenses")
+            top_expenses = tracker.get_top_n_in_month(selected_month, selected_year, n=5)
+            top_expenses['date'] = top_expenses['date'].dt.strftime('%Y-%m-%d')
+            top_expenses['amount'] = top_expenses['amount'].apply(lambda x: f"${x:.2f}")
+            st.dataframe(top_expenses, use_container_width=True, hide_index=True)
+
+
+@st.fragment
+def export_data_fragment(tracker):
+    st.header("📥 Export Data")
+
+    expense_count, _ = tracker.get_totals()
+
+    if expense_count == 0:
+        st.info("No data to export.")
+    else:
+        st.subheader("Export Options")
+        expenses_df = tracker.get_expenses()
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.write("### Export All Expenses to Excel")
+            excel_file = ReportExporter.export_to_excel(expenses_df)
+            st.download_button(
+                label="📊 Download Excel Report",
+                data=excel_file,
+                file_name=f"expenses_{datetime.now().strftime('%Y%m%d')}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                use_container_width=True
+            )
+
+        with col2:
+            st.write("### Export Monthly Report to PDF")
+            month = st.selectbox("Select Month", range(1, 13), index=datetime.now().month - 1,
+                               format_func=lambda x: datetime(2000, x, 1).strftime('%B'), key="pdf_month")
+            year = st.number_input("Year", min_value=2000, max_value=2100, value=datetime.now().year, key="pdf_year")
+
+            if st.button("Generate PDF", use_container_width=True):
+                monthly_data = tracker.get_monthly_data(month, year)
+                if not monthly_data.empty:
+                    month_name = datetime(2000, month, 1).strftime('%B')
+                    total = monthly_data['amount'].sum()
+                    count = len(monthly_data)
+                    pdf_file = ReportExporter.export_to_pdf(monthly_data, month_name, year, total, count)
+
+                    st.download_button(
+                        label="📄 Download PDF Report",
+                        data=pdf_file,
+                        file_name=f"report_{year}_{month:02d}.pdf",
+                        mime="application/pdf",
+                        use_container_width=True
+                    )
+                else:
+                    st.warning("No data for selected month")
+
+
+@st.fragment
+def sidebar_totals_fragment(tracker):
+    st.divider()
+    expense_count, total_amount = tracker.get_totals()
+    st.info(f"📊 Total Expenses: {expense_count}\n💵 Total Amount: ${total_amount:,.2f}")
+
+
 def main():
     st.set_page_config(page_title="Expense Tracker Pro", page_icon="💰", layout="wide")
     st.markdown("""
@@ -292,7 +836,7 @@ def main():
     """, unsafe_allow_html=True)
 
     if 'db' not in st.session_state:
-        st.session_state.db = Database()
+        st.session_state.db = get_db()
 
     if 'logged_in' not in st.session_state:
         st.session_state.logged_in = False
@@ -324,54 +868,7 @@ def main():
     categories = ['Food', 'Transport', 'Entertainment', 'Shopping', 'Bills', 'Healthcare', 'Education', 'Other']
 
     if page == "Dashboard":
-        st.header("📈 Dashboard Overview")
-        
-        expenses_df = tracker.get_expenses()
-        
-        if expenses_df.empty:
-            st.info("No expenses recorded yet. Start by adding your first expense!")
-        else:
-            col1, col2, col3, col4 = st.columns(4)
-            
-            total_spent = expenses_df['amount'].sum()
-            num_transactions = len(expenses_df)
-            avg_transaction = total_spent / num_transactions if num_transactions > 0 else 0
-            last_30_days = tracker.get_filtered_expenses(days=30)
-            last_30_days_total = last_30_days['amount'].sum() if not last_30_days.empty else 0
-
-            with col1:
-                st.metric("Total Spent", f"${total_spent:,.2f}")
-            with col2:
-                st.metric("Transactions", num_transactions)
-            with col3:
-                st.metric("Avg Transaction", f"${avg_transaction:.2f}")
-            with col4:
-                st.metric("Last 30 Days", f"${last_30_days_total:,.2f}")
-            
-            st.divider()
-
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("Spending by Category")
-                category_totals = expenses_df.groupby('category')['amount'].sum()
-                fig1, ax1 = plt.subplots(figsize=(8, 6))
-                ax1.pie(category_totals.values, labels=category_totals.index, autopct='%1.1f%%', startangle=90)
-                ax1.set_title('Category Distribution')
-                st.pyplot(fig1)
-            
-            with col2:
-                st.subheader("Recent Spending Trend")
-                daily_spending = expenses_df.groupby(expenses_df['date'].dt.date)['amount'].sum().tail(30)
-                fig2, ax2 = plt.subplots(figsize=(8, 6))
-                ax2.plot(daily_spending.index, daily_spending.values, marker='o', linestyle='-', linewidth=2)
-                ax2.set_xlabel('Date')
-                ax2.set_ylabel('Amount ($)')
-                ax2.set_title('Daily Spending (Last 30 Days)')
-                ax2.tick_params(axis='x', rotation=45)
-                ax2.grid(True, alpha=0.3)
-                plt.tight_layout()
-                st.pyplot(fig2)
+        dashboard_fragment(tracker)
 
     elif page == "Add Expense":
         st.header("➕ Add New Expense")
@@ -397,207 +894,43 @@ def main():
                 else:
                     st.error("Amount must be greater than 0")
 
-    elif page == "View Expenses":
-        st.header("📋 View Expenses")
-        
-        expenses_df = tracker.get_expenses()
-        
-        if expenses_df.empty:
-            st.info("No expenses to display.")
-        else:
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                filter_category = st.selectbox("Filter by Category", ['All'] + categories)
-            
-            with col2:
-                filter_days = st.selectbox("Time Period", 
-                                         ['All Time', 'Last 7 Days', 'Last 30 Days', 'Last 90 Days'])
-                days_map = {'All Time': None, 'Last 7 Days': 7, 'Last 30 Days': 30, 'Last 90 Days': 90}
-                days = days_map[filter_days]
-            
-            with col3:
-                sort_by = st.selectbox("Sort by", ['Date (Newest)', 'Date (Oldest)', 'Amount (High-Low)', 'Amount (Low-High)'])
-
-            filtered_df = tracker.get_filtered_expenses(
-                filter_category=filter_category if filter_category != 'All' else None,
-                days=days
-            )
-            
-            if not filtered_df.empty:
-                if sort_by == 'Date (Newest)':
-                    filtered_df = filtered_df.sort_values('date', ascending=False)
-                elif sort_by == 'Date (Oldest)':
-                    filtered_df = filtered_df.sort_values('date', ascending=True)
-                elif sort_by == 'Amount (High-Low)':
-                    filtered_df = filtered_df.sort_values('amount', ascending=False)
-                else:
-                    filtered_df = filtered_df.sort_values('amount', ascending=True)
-                
-                st.metric("Total", f"${filtered_df['amount'].sum():,.2f}")
-
-                display_df = filtered_df.copy()
-                display_df['date'] = display_df['date'].dt.strftime('%Y-%m-%d')
-                display_df['amount'] = display_df['amount'].apply(lambda x: f"${x:.2f}")
-                
-                st.dataframe(
-                    display_df[['id', 'date', 'category', 'amount', 'description']],
-                    use_container_width=True,
-                    hide_index=True
-                )
-                
-                st.divider()
-                with st.expander("🗑️ Delete an Expense"):
-                    delete_id = st.number_input("Enter expense ID to delete", min_value=1, step=1)
-                    if st.button("Delete Expense"):
-                        if tracker.delete_expense(delete_id):
-                            st.success("Expense deleted!")
-                            st.rerun()
-                        else:
-                            st.error("Invalid ID or permission denied")
+        st.divider()
+        st.subheader("📂 Import from CSV")
+        if 'csv_upload_key' not in st.session_state:
+            st.session_state.csv_upload_key = 0
+        if 'csv_import_message' in st.session_state:
+            st.success(st.session_state.pop('csv_import_message'))
+        csv_file = st.file_uploader("CSV with date, category, amount and optional description columns", type="csv",
+                                    key=f"csv_upload_{st.session_state.csv_upload_key}")
+        if csv_file is not None:
+            try:
+                rows = parse_expenses_csv(csv_file, categories)
+            except ValueError as e:
+                st.error(f"Could not import file: {e}")
             else:
-                st.info("No expenses match the selected filters.")
+                if not rows:
+                    st.warning("The file has no expenses to import")
+                elif st.button(f"Import {len(rows)} Expenses", use_container_width=True):
+                    inserted = tracker.add_expenses_bulk(rows)
+                    # A fresh key empties the uploader so the same file can't be imported twice.
+                    st.session_state.csv_upload_key += 1
+                    st.session_state.csv_import_message = f"✅ Imported {inserted} expenses"
+                    st.rerun()
+
+    elif page == "View Expenses":
+        view_expenses_fragment(tracker, categories)
 
     elif page == "Analytics":
-        st.header("📊 Analytics & Insights")
-        
-        expenses_df = tracker.get_expenses()
-        
-        if expenses_df.empty:
-            st.info("No data available for analysis.")
-        else:
-            st.subheader("Category Breakdown")
-            summary = tracker.get_category_summary()
-            
-            col1, col2 = st.columns([2, 1])
-            
-            with col1:
-                st.dataframe(summary, use_container_width=True)
-            
-            with col2:
-                top_category = summary.index[0]
-                top_amount = summary.iloc[0]['Total']
-                st.metric("Top Category", top_category)
-                st.metric("Amount", f"${top_amount:,.2f}")
-            
-            st.divider()
+        analytics_fragment(tracker)
 
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("Category Comparison")
-                fig3, ax3 = plt.subplots(figsize=(8, 6))
-                summary['Total'].sort_values(ascending=True).plot(kind='barh', ax=ax3, color='steelblue')
-                ax3.set_xlabel('Amount ($)')
-                ax3.set_title('Total Spending by Category')
-                st.pyplot(fig3)
-            
-            with col2:
-                st.subheader("Monthly Trend")
-                monthly_spending = expenses_df.groupby(expenses_df['date'].dt.to_period('M'))['amount'].sum()
-                monthly_spending.index = monthly_spending.index.astype(str)
-                fig4, ax4 = plt.subplots(figsize=(8, 6))
-                ax4.bar(monthly_spending.index, monthly_spending.values, color='coral')
-                ax4.set_xlabel('Month')
-                ax4.set_ylabel('Amount ($)')
-                ax4.set_title('Monthly Spending')
-                ax4.tick_params(axis='x', rotation=45)
-                st.pyplot(fig4)
     elif page == "Monthly Report":
-        st.header("📅 Monthly Report")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            selected_month = st.selectbox("Month", range(1, 13), index=datetime.now().month - 1,
-                                        format_func=lambda x: datetime(2000, x, 1).strftime('%B'))
-        with col2:
-            selected_year = st.number_input("Year", min_value=2000, max_value=2100, value=datetime.now().year)
-        
-        if st.button("Generate Report", use_container_width=True):
-            monthly_data = tracker.get_monthly_data(selected_month, selected_year)
-            
-            if monthly_data.empty:
-                st.warning(f"No expenses found for {datetime(2000, selected_month, 1).strftime('%B')} {selected_year}")
-            else:
-                total_spent = monthly_data['amount'].sum()
-                num_transactions = len(monthly_data)
-                avg_transaction = total_spent / num_transactions
-                
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Total Spent", f"${total_spent:,.2f}")
-                with col2:
-                    st.metric("Transactions", num_transactions)
-                with col3:
-                    st.metric("Average", f"${avg_transaction:.2f}")
-                
-                st.divider()
-                
-                st.subheader("Category Breakdown")
-                category_summary = monthly_data.groupby('category')['amount'].agg(['sum', 'count'])
-                category_summary.columns = ['Total', 'Count']
-                category_summary['Percentage'] = (category_summary['Total'] / total_spent * 100).round(2)
-                category_summary = category_summary.sort_values('Total', ascending=False)
-                st.dataframe(category_summary, use_container_width=True)
-                
-                st.divider()
-                
-                st.subheader("Top 5 Expenses")
-                top_expenses = monthly_data.nlargest(5, 'amount')[['date', 'category', 'amount', 'description']]
-                top_expenses['date'] = top_expenses['date'].dt.strftime('%Y-%m-%d')
-                top_expenses['amount'] = top_expenses['amount'].apply(lambda x: f"${x:.2f}")
-                st.dataframe(top_expenses, use_container_width=True, hide_index=True)
+        monthly_report_fragment(tracker)
 
     elif page == "Export Data":
-        st.header("📥 Export Data")
-        
-        expenses_df = tracker.get_expenses()
-        
-        if expenses_df.empty:
-            st.info("No data to export.")
-        else:
-            st.subheader("Export Options")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.write("### Export All Expenses to Excel")
-                excel_file = ReportExporter.export_to_excel(expenses_df)
-                st.download_button(
-                    label="📊 Download Excel Report",
-                    data=excel_file,
-                    file_name=f"expenses_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    use_container_width=True
-                )
-            
-            with col2:
-                st.write("### Export Monthly Report to PDF")
-                month = st.selectbox("Select Month", range(1, 13), index=datetime.now().month - 1,
-                                   format_func=lambda x: datetime(2000, x, 1).strftime('%B'), key="pdf_month")
-                year = st.number_input("Year", min_value=2000, max_value=2100, value=datetime.now().year, key="pdf_year")
-                
-                if st.button("Generate PDF", use_container_width=True):
-                    monthly_data = tracker.get_monthly_data(month, year)
-                    if not monthly_data.empty:
-                        month_name = datetime(2000, month, 1).strftime('%B')
-                        total = monthly_data['amount'].sum()
-                        count = len(monthly_data)
-                        pdf_file = ReportExporter.export_to_pdf(monthly_data, month_name, year, total, count)
-                        
-                        st.download_button(
-                            label="📄 Download PDF Report",
-                            data=pdf_file,
-                            file_name=f"report_{year}_{month:02d}.pdf",
-                            mime="application/pdf",
-                            use_container_width=True
-                        )
-                    else:
-                        st.warning("No data for selected month")
-    expenses_df = tracker.get_expenses()
-    st.sidebar.divider()
-    st.sidebar.info(f"📊 Total Expenses: {len(expenses_df)}\n💵 Total Amount: ${expenses_df['amount'].sum():,.2f}")
+        export_data_fragment(tracker)
+
+    with st.sidebar:
+        sidebar_totals_fragment(tracker)
 
 
 # Run the application